@@ -1,5 +1,10 @@
 # Example file showing a circle moving on screen
+import time
+STARTUP_START = time.perf_counter()
+
+import io
 import os
+from concurrent.futures import Future, ThreadPoolExecutor
 from copy import copy
 from dataclasses import dataclass, field
 from enum import Enum
@@ -42,6 +47,9 @@ FONT_SIZE = 40
 TITLE_FONT_SIZE = 50
 STATS_TITLE_FONT_SIZE = 70
 STATS_MINI_FONT_SIZE = 10
+LOADING_FONT_SIZE = 70
+
+FONT_FILE = FONTS_FOLDER + "Oswaldt.ttf"
 
 WHITE = Color(255, 255, 255, 255)
 BLACK = Color(0, 0, 0, 255)
@@ -62,6 +70,31 @@ STATS_COLORS = [
     Color(139, 92, 246, 255),
 ]
 
+# Assets loaded in the background while the loading frame is shown
+BACKGROUNDS = [
+    "gigahard_entrance",
+    "gigahard_tour",
+    "gigahard_office",
+]
+
+# Sprite name -> scale
+SPRITES = {
+    "thiago": 0.5,
+    "alissa": 0.3,
+    "maria_clara": 0.5,
+    "recepcionist": 0.5,
+    "carlos": 0.5,
+    "wellington": 0.5,
+}
+
+# Sound effect name -> volume
+SOUNDS = {
+    "enter_menu": 0.5,
+    "enter": 2.0,
+    "move_menu": 4.0,
+    "s": 0.5,
+}
+
 # class syntax
 
 class Pos(Enum):
@@ -125,12 +158,94 @@ class Game:
     background: Surface | None = None
     show_stats: bool = False
     stats_colors: list[Color] = field(default_factory=list)
+    audio: Future | None = None
+    sounds: dict[str, pygame.mixer.Sound] | None = None
+    end_music_pending: bool = False
+
+@dataclass
+class StartupTimer:
+    start: float = STARTUP_START
+    marks: list[tuple[str, float]] = field(default_factory=list)
+    reported: bool = False
+
+    def mark(self, name: str) -> None:
+        self.marks.append((name, time.perf_counter() - self.start))
+
+    def report(self) -> None:
+        if self.reported: return
+        self.reported = True
+        print("Startup (since main.py started loading): " + ", ".join(f"{name} {t * 1000:.1f} ms" for name, t in self.marks))
 
 
 def scale_uniform(s: Surface, scalar: float) -> Surface:
     w, h = s.get_size()
     return pygame.transform.smoothscale(s, (w * scalar, h * scalar))
 
+def read_font(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+def load_fonts(data: bytes, sizes: list[int]) -> dict[int, Font]:
+    # Every size shares the same buffer, the file is only read once
+    return {size: Font(io.BytesIO(data), size) for size in sizes}
+
+def load_background(name: str) -> Surface:
+    return pygame.image.load(BG_FOLDER + name + ".png").convert()
+
+def load_sprite(name: str, scalar: float) -> Surface:
+    return scale_uniform(pygame.image.load(CARACTER_FOLDER + name + ".png").convert_alpha(), scalar)
+
+def load_assets(executor: ThreadPoolExecutor) -> dict[str, Future]:
+    assets = {name: executor.submit(load_background, name) for name in BACKGROUNDS}
+    assets.update({name: executor.submit(load_sprite, name, scalar) for name, scalar in SPRITES.items()})
+    return assets
+
+def load_audio(timer: StartupTimer) -> dict[str, pygame.mixer.Sound]:
+    try:
+        pygame.mixer.init()
+        pygame.mixer.music.load(MUSIC_FOLDER + "background.mp3") 
+        pygame.mixer.music.play(-1,0.0)
+        pygame.mixer.music.set_volume(0.1)
+
+        sounds = {}
+        for name, volume in SOUNDS.items():
+            sounds[name] = pygame.mixer.Sound(MUSIC_FOLDER + name + ".wav")
+            sounds[name].set_volume(volume)
+    except Exception as e:
+        timer.mark(f"audio failed ({e})")
+        raise
+    timer.mark("audio")
+    return sounds
+
+def play_end_music() -> None:
+    pygame.mixer.music.fadeout(2000) 
+    pygame.mixer.music.load(MUSIC_FOLDER + "end.mp3") 
+    pygame.mixer.music.set_volume(0.7)
+    pygame.mixer.music.play(-1,0.0)
+
+def finish_audio(game: Game) -> None:
+    if game.audio is None: return
+    audio = game.audio
+    game.audio = None
+    error = audio.exception()
+    if error is not None:
+        print(f"Audio disabled: {error}")
+        return
+    game.sounds = audio.result()
+    if game.end_music_pending:
+        game.end_music_pending = False
+        play_end_music()
+
+def play_sound(game: Game, name: str) -> None:
+    # Sounds are skipped until the background audio init finishes, or for good if it failed
+    if game.sounds is not None:
+        game.sounds[name].play()
+
+def draw_loading(screen: Surface, font: Font) -> None:
+    screen.fill(MENU_BG_COLOR)
+    text = font.render("Carregando...", True, MENU_FG_COLOR)
+    screen.blit(text, text.get_rect(center=screen.get_rect().center))
+
 def draw_caracters(game: Game) -> None:
     left_cs = [c for c in game.caracters if c.pos == Pos.LEFT]
     right_cs = [c for c in game.caracters if c.pos == Pos.RIGHT]
@@ -368,16 +483,16 @@ def update_game(game: Game):
                     game.background = action.background
                     game.action_idx += 1
             case type.ShowStats:
-                pygame.mixer.music.fadeout(2000) 
-                pygame.mixer.music.load(MUSIC_FOLDER + "end.mp3") 
-                pygame.mixer.music.set_volume(0.7)
-                pygame.mixer.music.play(-1,0.0)
+                if game.sounds is not None:
+                    play_end_music()
+                else:
+                    game.end_music_pending = True
                 game.show_stats = True
                 game.action_idx += 1
     else:
         pass
 
-def game_script(game: Game) -> None:
+def game_script(game: Game, assets: dict[str, Future]) -> None:
     def show(c: Caracter, pos: Pos = Pos.LEFT):
         c.pos = pos
         game.actions.append(Action(type=ActionType.ShowCaracter, caracter=c))
@@ -408,39 +523,39 @@ def game_script(game: Game) -> None:
         }
         game.player_status = status
 
-        bg_office = pygame.image.load(BG_FOLDER + 'gigahard_entrance.png').convert()
-        bg_reception = pygame.image.load(BG_FOLDER + 'gigahard_entrance.png').convert()
-        bg_office_tour = pygame.image.load(BG_FOLDER + 'gigahard_tour.png').convert()
-        bg_meeting_room = pygame.image.load(BG_FOLDER + 'gigahard_office.png').convert()
+        bg_office = assets["gigahard_entrance"].result()
+        bg_reception = assets["gigahard_entrance"].result()
+        bg_office_tour = assets["gigahard_tour"].result()
+        bg_meeting_room = assets["gigahard_office"].result()
 
         thiago = Caracter(
             name="Thiago", 
-            sprite=scale_uniform(pygame.image.load(CARACTER_FOLDER + 'thiago.png').convert_alpha(), 0.5), 
+            sprite=assets["thiago"].result(), 
             pos=Pos.LEFT
         )
         alissa = Caracter(
             name="Alissa", 
-            sprite=scale_uniform(pygame.image.load(CARACTER_FOLDER + 'alissa.png').convert_alpha(), 0.3), 
+            sprite=assets["alissa"].result(), 
             pos=Pos.LEFT
         )
         maria = Caracter(
             name="Maria Clara", 
-            sprite=scale_uniform(pygame.image.load(CARACTER_FOLDER + 'maria_clara.png').convert_alpha(), 0.5), 
+            sprite=assets["maria_clara"].result(), 
             pos=Pos.LEFT
         )
         recepcionista = Caracter(
             name="Recepcionista", 
-            sprite=scale_uniform(pygame.image.load(CARACTER_FOLDER + 'recepcionist.png').convert_alpha(), 0.5), 
+            sprite=assets["recepcionist"].result(), 
             pos=Pos.LEFT
         )
         carlos = Caracter(
             name="Carlos", 
-            sprite=scale_uniform(pygame.image.load(CARACTER_FOLDER + 'carlos.png').convert_alpha(), 0.5), 
+            sprite=assets["carlos"].result(), 
             pos=Pos.LEFT
         )
         wellington = Caracter(
             name="Wellington", 
-            sprite=scale_uniform(pygame.image.load(CARACTER_FOLDER + 'wellington.png').convert_alpha(), 0.5), 
+            sprite=assets["wellington"].result(), 
             pos=Pos.LEFT
         )
 
@@ -556,42 +671,64 @@ def game_script(game: Game) -> None:
 
 
 def main():
-    pygame.init()
+    timer = StartupTimer()
+    timer.mark("import")
+
+    # Only the subsystems needed for the first frame, the mixer is started in the background
+    pygame.display.init()
+    pygame.font.init()
+
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    font_data = read_font(FONT_FILE)
+    loading_font = load_fonts(font_data, [LOADING_FONT_SIZE])[LOADING_FONT_SIZE]
+    draw_loading(screen, loading_font)
+    pygame.display.flip()
+    timer.mark("first frame")
+
+    executor = ThreadPoolExecutor()
+    audio = executor.submit(load_audio, timer)
+    assets = load_assets(executor)
+
+    fonts = load_fonts(font_data, [FONT_SIZE, TITLE_FONT_SIZE, STATS_TITLE_FONT_SIZE, STATS_MINI_FONT_SIZE])
 
     game = Game(
-        screen=pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT)),
+        screen=screen,
         caracter_surface=Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA, 32),
         dialog_surface=Surface((DIALOG_WIDTH, DIALOG_HEIGHT), pygame.SRCALPHA, 32),
         menu_surface=Surface((MENU_WIDTH, MENU_HEIGHT), pygame.SRCALPHA, 32),
         stats_surface=Surface((STATS_WIDTH, STATS_HEIGHT), pygame.SRCALPHA, 32),
         stats_mini_surface=Surface((MINI_STATS_WIDTH, MINI_STATS_HEIGHT), pygame.SRCALPHA, 32),
-        font=Font(FONTS_FOLDER + "Oswaldt.ttf", FONT_SIZE),
-        menu_font=Font(FONTS_FOLDER + "Oswaldt.ttf", FONT_SIZE),
-        stats_font=Font(FONTS_FOLDER + "Oswaldt.ttf", FONT_SIZE),
-        stats_mini_font=Font(FONTS_FOLDER + "Oswaldt.ttf", STATS_MINI_FONT_SIZE),
-        stats_title_font=Font(FONTS_FOLDER + "Oswaldt.ttf", STATS_TITLE_FONT_SIZE),
-        dialog_title_font=Font(FONTS_FOLDER + "Oswaldt.ttf", TITLE_FONT_SIZE),
+        font=fonts[FONT_SIZE],
+        menu_font=fonts[FONT_SIZE],
+        stats_font=fonts[FONT_SIZE],
+        stats_mini_font=fonts[STATS_MINI_FONT_SIZE],
+        stats_title_font=fonts[STATS_TITLE_FONT_SIZE],
+        dialog_title_font=fonts[TITLE_FONT_SIZE],
         useful_keys=[K_RETURN, K_UP, K_DOWN, K_s],
         stats_colors=STATS_COLORS,
+        audio=audio,
     )
 
-    game_script(game)
-
     clock = pygame.time.Clock()
-    pygame.mixer.init()
-    pygame.mixer.music.load(MUSIC_FOLDER + "background.mp3") 
-    pygame.mixer.music.play(-1,0.0)
-    pygame.mixer.music.set_volume(0.1)
 
-    se_enter_menu = pygame.mixer.Sound(MUSIC_FOLDER + "enter_menu.wav")
-    se_enter = pygame.mixer.Sound(MUSIC_FOLDER + "enter.wav")
-    se_move_menu = pygame.mixer.Sound(MUSIC_FOLDER + "move_menu.wav")
-    se_s = pygame.mixer.Sound(MUSIC_FOLDER + "s.wav")
+    # Keep the window responsive while the images are decoded
+    while game.running and not all(f.done() for f in assets.values()):
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                game.running = False
+        draw_loading(game.screen, loading_font)
+        pygame.display.flip()
+        clock.tick(60)
+
+    if not game.running:
+        # Workers may still be using the display or the mixer
+        executor.shutdown(wait=True, cancel_futures=True)
+        timer.report()
+        pygame.quit()
+        return
 
-    se_enter_menu.set_volume(0.5)
-    se_enter.set_volume(2.0)
-    se_move_menu.set_volume(4.0)
-    se_s.set_volume(0.5)
+    game_script(game, assets)
+    timer.mark("assets")
 
     while game.running:
         # poll for events
@@ -600,6 +737,10 @@ def main():
             if event.type == pygame.QUIT:
                 game.running = False
 
+        if game.audio is not None and game.audio.done():
+            finish_audio(game)
+            timer.report()
+
         keys = pygame.key.get_pressed()
 
         update_game(game)
@@ -610,7 +751,7 @@ def main():
 
         if is_pressed(K_s):
             game.show_stats = not game.show_stats
-            se_s.play()
+            play_sound(game, "s")
 
         if not game.show_stats:
             if game.menu:
@@ -622,19 +763,19 @@ def main():
                         game.player_status[k] += selected_option.status[k]
 
                     game.menu = None
-                    se_enter_menu.play()
+                    play_sound(game, "enter_menu")
 
                 elif is_pressed(K_UP):
                     game.menu_idx = (game.menu_idx - 1) % len(game.menu)
-                    se_move_menu.play()
+                    play_sound(game, "move_menu")
 
                 elif is_pressed(K_DOWN):
                     game.menu_idx = (game.menu_idx + 1) % len(game.menu)
-                    se_move_menu.play()
+                    play_sound(game, "move_menu")
             else:
                 if is_pressed(K_RETURN):
                     game.action_idx += 1
-                    se_enter.play()
+                    play_sound(game, "enter")
 
         for k in game.useful_keys:
             game.last_keys[k] = keys[k]
@@ -666,6 +807,9 @@ def main():
         pygame.display.flip()
         game.dt = clock.tick(60) / 1000
 
+    # The audio init may still be running if the game was closed early
+    executor.shutdown(wait=True)
+    timer.report()
     pygame.quit()
 
 if __name__ == "__main__":